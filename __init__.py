@@ -2,8 +2,11 @@ from __future__ import annotations
 
 import asyncio
 import random
+import string
+import sys
 from collections import deque
-from typing import Deque, Dict, List, Optional, Sequence
+from functools import lru_cache
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
 
 from nonebot import get_driver, get_plugin_config, on_message
 from nonebot.adapters import Bot
@@ -18,8 +21,8 @@ from nonebot.matcher import Matcher
 from nonebot.plugin import PluginMetadata
 
 from .chat import close_chat_client, generate_chat_reply
-from .image_utils import extract_image_data_urls
-from .models import HistoryEntry
+from .image_utils import close_image_client, extract_image_data_urls
+from .models import HistoryEntry, append_image_hint
 from .plugin_system import (
     LLMRequestPayload,
     LLMResponsePayload,
@@ -55,11 +58,16 @@ class HistoryManager:
         self._store: Dict[str, Deque[HistoryEntry]] = {}
 
     def snapshot(self, session_id: str) -> List[HistoryEntry]:
+        # 返回副本：等待 LLM 期间新消息仍会追加到 deque，插件拿到的历史需保持不变
         history = self._store.get(session_id)
         if not history:
             return []
         return list(history)
 
+    def format_history(self, session_id: str) -> str:
+        """直接在 deque 上拼接历史记录文本，不复制条目列表。"""
+        return "\n".join(e.line for e in self._store.get(session_id, ()))
+
     def append(self, session_id: str, entry: HistoryEntry) -> None:
         history = self._store.get(session_id)
         if history is None:
@@ -75,6 +83,7 @@ driver = get_driver()
 @driver.on_shutdown
 async def _close_client() -> None:
     await close_chat_client()
+    await close_image_client()
 
 
 _PASSIVE_REPLY_SUFFIX = (
@@ -93,54 +102,57 @@ _PROACTIVE_REPLY_SUFFIX = (
     "在除了最后一句的句子末尾加上///作为分句符。"
 )
 
+_TemplatePlan = Tuple[Tuple[str, Optional[str]], ...]
+
+
+def _compile_template(template: str) -> _TemplatePlan:
+    """预先解析模板为 (字面量, 字段名) 序列，避免每条消息都重新解析 format 语法。"""
+    return tuple(
+        (literal, field_name)
+        for literal, field_name, _, _ in string.Formatter().parse(template)
+    )
+
+
+def _render_template(plan: _TemplatePlan, values: Dict[str, str]) -> str:
+    return "".join(
+        literal + values[field_name] if field_name else literal
+        for literal, field_name in plan
+    )
+
+
+_PASSIVE_REPLY_PLAN = _compile_template(_PASSIVE_REPLY_SUFFIX)
+_PROACTIVE_REPLY_PLAN = _compile_template(_PROACTIVE_REPLY_SUFFIX)
+
 
 def generate_prompt(
     *,
-    history: List[HistoryEntry],
+    history_text: str,
     sender: str,
     latest_message: str,
     latest_images: Optional[Sequence[str]] = None,
     is_proactive: bool = False,
 ) -> str:
+    """拼接 user 消息：历史记录在前，最新消息与回复要求在后。"""
     if is_proactive:
-        # 主动回复：最新消息也放入 history 一起格式化
-        all_entries = [*history, HistoryEntry(
+        # 主动回复：最新消息作为新的一行接在 history 之后
+        latest_line = HistoryEntry(
             speaker=sender, content=latest_message, is_bot=False,
             images=list(latest_images) if latest_images else [],
-        )]
-        if all_entries:
-            history_lines = "\n".join(_format_history_entry(e) for e in all_entries)
-        else:
-            history_lines = "（暂无聊天记录）"
-        character = plugin_config.simple_gpt_prompt_template
-        return character + "\n" + _PROACTIVE_REPLY_SUFFIX.format(history=history_lines)
+        ).line
+        history_lines = f"{history_text}\n{latest_line}" if history_text else latest_line
+        return _render_template(_PROACTIVE_REPLY_PLAN, {"history": history_lines})
     else:
         # 被动回复：保持原有行为
-        if history:
-            history_lines = "\n".join(_format_history_entry(e) for e in history)
-        else:
-            history_lines = "（暂无聊天记录）"
+        history_lines = history_text or "（暂无聊天记录）"
         latest_section = latest_message
         if latest_images:
-            latest_section = _append_image_hint(latest_section, len(latest_images))
-        character = plugin_config.simple_gpt_prompt_template
-        return character + "\n" + _PASSIVE_REPLY_SUFFIX.format(
-            history=history_lines, sender=sender, latest_message=latest_section
+            latest_section = append_image_hint(latest_section, len(latest_images))
+        return _render_template(
+            _PASSIVE_REPLY_PLAN,
+            {"history": history_lines, "sender": sender, "latest_message": latest_section},
         )
 
 
-def _format_history_entry(entry: HistoryEntry) -> str:
-    content = entry.content
-    if entry.images:
-        content = _append_image_hint(content, len(entry.images))
-    speaker = f"{entry.speaker}({entry.user_id})" if entry.user_id else entry.speaker
-    return f"{speaker}：{content}"
-
-
-def _append_image_hint(content: str, count: int) -> str:
-    return f"{content}\n（附带 {count} 张图片）"
-
-
 def _clear_history_images(history: Sequence[HistoryEntry]) -> List[HistoryEntry]:
     """返回移除图片上下文后的历史记录副本。"""
 
@@ -156,6 +168,12 @@ def _clear_history_images(history: Sequence[HistoryEntry]) -> List[HistoryEntry]
     ]
 
 
+@lru_cache(maxsize=4096)
+def _session_id(group_id: int) -> str:
+    """群号对应的会话 ID，驻留后同一群的后续消息复用同一个字符串对象。"""
+    return sys.intern(f"group_{group_id}")
+
+
 def should_reply(event: MessageEvent) -> bool:
     if event.is_tome():
         return True
@@ -199,15 +217,9 @@ async def _(matcher: Matcher, bot: Bot, event: MessageEvent) -> None:
     else:
         image_contexts = await extract_image_data_urls(event.message)
 
-    session_id = f"group_{event.group_id}"
+    session_id = _session_id(event.group_id)
     display_name = event.sender.card or event.sender.nickname or f"用户{user_id}"
 
-    history_before = history_manager.snapshot(session_id)
-    llm_history = (
-        _clear_history_images(history_before)
-        if plugin_config.simple_gpt_disable_image_input
-        else history_before
-    )
     is_tome_event = event.is_tome()
     reply_needed = should_reply(event)
     if (
@@ -225,8 +237,16 @@ async def _(matcher: Matcher, bot: Bot, event: MessageEvent) -> None:
     reply_text: Optional[str] = None
 
     if reply_needed:
+        # 绝大多数消息不需要回复，只有确定回复时才复制历史记录
+        history_before = history_manager.snapshot(session_id)
+        llm_history = (
+            _clear_history_images(history_before)
+            if plugin_config.simple_gpt_disable_image_input
+            else history_before
+        )
+        history_text = history_manager.format_history(session_id)
         prompt = generate_prompt(
-            history=llm_history,
+            history_text=history_text,
             sender=f"{display_name}({user_id})",
             latest_message=plain_text,
             latest_images=image_contexts,
@@ -244,8 +264,14 @@ async def _(matcher: Matcher, bot: Bot, event: MessageEvent) -> None:
             history=llm_history,
             sender=display_name,
             latest_message=plain_text,
+            system_prompt=plugin_config.simple_gpt_prompt_template,
             images=llm_images,
-            extra={"session_id": session_id, "sender_user_id": user_id, "is_proactive": not is_tome_event},
+            extra={
+                "session_id": session_id,
+                "sender_user_id": user_id,
+                "is_proactive": not is_tome_event,
+                "latest_image_count": len(image_contexts),
+            },
         )
         llm_request = await emit_before_llm_request(llm_request)
         if plugin_config.simple_gpt_disable_image_input:
@@ -256,19 +282,25 @@ async def _(matcher: Matcher, bot: Bot, event: MessageEvent) -> None:
         # 被 @ 时提高重试次数，主动发言保持默认重试次数
         max_retries = 5 if is_tome_event else 3
         if reply_needed:
-            logger.debug(f"最终 prompt: {llm_request.prompt}")
-            generated = await generate_chat_reply(
-                prompt=llm_request.prompt,
-                api_key=plugin_config.simple_gpt_api_key,
-                base_url=plugin_config.simple_gpt_api_base,
-                model=plugin_config.simple_gpt_model,
-                temperature=plugin_config.simple_gpt_temperature,
-                max_tokens=plugin_config.simple_gpt_max_tokens,
-                timeout=plugin_config.simple_gpt_timeout,
-                images=llm_request.images,
-                debug=plugin_config.simple_gpt_prompt_debug,
-                max_retries=max_retries,
-            )
+            cached_reply: Optional[str] = llm_request.extra.get("cached_reply")
+            if cached_reply:
+                # 插件（如语义缓存）已提供回复，无需调用模型
+                generated: Optional[str] = cached_reply
+            else:
+                logger.debug(f"最终 prompt: {llm_request.prompt}")
+                generated = await generate_chat_reply(
+                    prompt=llm_request.prompt,
+                    system_prompt=llm_request.system_prompt,
+                    api_key=plugin_config.simple_gpt_api_key,
+                    base_url=plugin_config.simple_gpt_api_base,
+                    model=plugin_config.simple_gpt_model,
+                    temperature=plugin_config.simple_gpt_temperature,
+                    max_tokens=plugin_config.simple_gpt_max_tokens,
+                    timeout=plugin_config.simple_gpt_timeout,
+                    images=llm_request.images,
+                    debug=plugin_config.simple_gpt_prompt_debug,
+                    max_retries=max_retries,
+                )
             # 主动发言时，如果服务器错误则不回复
             if not generated and not is_tome_event:
                 logger.error(
@@ -280,6 +312,7 @@ async def _(matcher: Matcher, bot: Bot, event: MessageEvent) -> None:
                 response_payload = LLMResponsePayload(
                     content=reply_text,
                     request=llm_request,
+                    extra={"is_fallback_reply": not generated},
                 )
                 response_payload = await emit_after_llm_response(response_payload)
                 reply_text = response_payload.content
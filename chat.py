@@ -1,17 +1,31 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import json
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+import httpx
 from nonebot.log import logger
-from openai import AsyncOpenAI, OpenAIError
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, OpenAIError
+from .image_utils import data_url_digest
 from .utils.deepseek_marker import INNER_OS_MARKER, NO_INNER_OS_MARKER
 
 _client_lock = asyncio.Lock()
-_request_lock = asyncio.Lock()
 _client: Optional[AsyncOpenAI] = None
 _client_config: Optional[Tuple[str, str, float]] = None
 
+CHAT_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+# 仅缓存确定性调用（temperature == 0）的回复
+RESPONSE_CACHE_MAXSIZE = 256
+_response_cache: "OrderedDict[str, str]" = OrderedDict()
+_response_cache_hits = 0
+_response_cache_misses = 0
+# 进行中的请求，相同请求并发到达时共享同一个结果
+_inflight_requests: Dict[str, "asyncio.Future[Optional[str]]"] = {}
+
 
 async def _get_client(
     *, api_key: str, base_url: str, timeout: float
@@ -34,11 +48,63 @@ async def _get_client(
             except Exception as exc:  # noqa: BLE001
                 logger.debug(f"simple-gpt: 关闭旧的 OpenAI 客户端时出错：{exc}")
 
-        _client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=timeout)
+        _client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=timeout,
+            http_client=DefaultAsyncHttpxClient(limits=CHAT_HTTP_LIMITS),
+        )
         _client_config = config
         return _client
 
 
+def _response_cache_key(
+    *,
+    prompt: str,
+    system_prompt: Optional[str],
+    base_url: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    images: Optional[Sequence[str]],
+) -> str:
+    key_data = {
+        "base_url": base_url,
+        "model": model,
+        "system_prompt": system_prompt or "",
+        "prompt": prompt,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        # 图片 data URL 可能有数 MB，只用短标识参与计算
+        "images": [data_url_digest(image) for image in images or ()],
+    }
+    raw = json.dumps(key_data, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _get_cached_response(key: str) -> Optional[str]:
+    global _response_cache_hits, _response_cache_misses
+
+    cached = _response_cache.get(key)
+    if cached is None:
+        _response_cache_misses += 1
+        return None
+    _response_cache.move_to_end(key)
+    _response_cache_hits += 1
+    logger.debug(
+        f"simple-gpt: 命中回复缓存（hits={_response_cache_hits}, "
+        f"misses={_response_cache_misses}）"
+    )
+    return cached
+
+
+def _store_cached_response(key: str, content: str) -> None:
+    _response_cache[key] = content
+    _response_cache.move_to_end(key)
+    if len(_response_cache) > RESPONSE_CACHE_MAXSIZE:
+        _response_cache.popitem(last=False)
+
+
 def _extract_text_content(message: object) -> Optional[str]:
     """Extract plain text from a ChatCompletionMessage."""
 
@@ -64,6 +130,7 @@ def _extract_text_content(message: object) -> Optional[str]:
 async def generate_chat_reply(
     *,
     prompt: str,
+    system_prompt: Optional[str] = None,
     api_key: str,
     base_url: str,
     model: str,
@@ -80,7 +147,10 @@ async def generate_chat_reply(
     # Debug 模式：直接返回 prompt
     if debug:
         logger.info("simple-gpt: 处于 Prompt 调试模式，直接返回构造的 prompt")
-        debug_info = f"=== PROMPT DEBUG MODE ===\n\n{prompt}"
+        debug_info = "=== PROMPT DEBUG MODE ===\n\n"
+        if system_prompt:
+            debug_info += f"=== SYSTEM ===\n{system_prompt}\n\n=== USER ===\n"
+        debug_info += prompt
         if images:
             debug_info += f"\n\n=== IMAGES ({len(images)}) ==="
             for idx, img_url in enumerate(images, 1):
@@ -93,6 +163,26 @@ async def generate_chat_reply(
         logger.warning("simple-gpt: 未配置 API Key，跳过调用。")
         return None
 
+    request_key = _response_cache_key(
+        prompt=prompt,
+        system_prompt=system_prompt,
+        base_url=base_url,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        images=images,
+    )
+    if temperature == 0:
+        cached = _get_cached_response(request_key)
+        if cached is not None:
+            return cached
+
+    # 相同请求正在进行时直接等待其结果，避免重复调用接口
+    inflight = _inflight_requests.get(request_key)
+    if inflight is not None:
+        logger.info("simple-gpt: 存在相同的进行中请求，等待其结果")
+        return await asyncio.shield(inflight)
+
     logger.info(
         f"simple-gpt: 准备调用 OpenAI，model={model}, base_url={base_url}, "
         f"temperature={temperature}, max_tokens={max_tokens}, images={len(images or [])}"
@@ -119,19 +209,58 @@ async def generate_chat_reply(
     if "deepseek" in model:
         user_message_content = user_message_content + NO_INNER_OS_MARKER
 
+    # 静态人设在前、动态内容在后，便于命中服务端的 prompt 前缀缓存
+    messages: List[Dict[str, Any]] = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": user_message_content})
+
+    task = asyncio.ensure_future(
+        _request_completion(
+            client,
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_retries=max_retries,
+        )
+    )
+    _inflight_requests[request_key] = task
+
+    def _on_done(done: "asyncio.Future[Optional[str]]") -> None:
+        _inflight_requests.pop(request_key, None)
+        # 在任务完成时写缓存：发起方即使已被取消，结果也不会丢失
+        if temperature == 0 and not done.cancelled() and done.exception() is None:
+            result = done.result()
+            if result:
+                _store_cached_response(request_key, result)
+
+    task.add_done_callback(_on_done)
+    # shield 保证调用方被取消时，其他等待同一请求的调用方不受影响
+    return await asyncio.shield(task)
+
+
+async def _request_completion(
+    client: AsyncOpenAI,
+    *,
+    model: str,
+    messages: List[Dict[str, Any]],
+    temperature: float,
+    max_retries: int,
+) -> Optional[str]:
+    """Send one chat completion request with retries."""
+
     last_error: Optional[Exception] = None
     for attempt in range(1, max_retries + 1):
         try:
-            async with _request_lock:
-                completion = await client.chat.completions.create(
-                    model=model,
-                    messages=[{"role": "user", "content": user_message_content}],
-                    temperature=temperature,
-                    reasoning_effort="xhigh",
-                    extra_body={"thinking": {"type": "enabled"}},
-                    # 暂时不添加最大 token 数量
-                    # max_tokens=max_tokens,
-                )
+            completion = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                reasoning_effort="xhigh",
+                extra_body={"thinking": {"type": "enabled"}},
+                # 暂时不添加最大 token 数量
+                # max_tokens=max_tokens,
+            )
         except OpenAIError as exc:
             last_error = exc
             logger.warning(f"simple-gpt: OpenAI 请求失败（第 {attempt}/{max_retries} 次）：{exc}")
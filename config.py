@@ -27,7 +27,7 @@ class Config(BaseModel):
             "and prefer not to respond with lengthy replies. "
             "Using plain text in response and avoid using lists or enumeration expressions, emphasis and markdown."
         ),
-        description="拼接 prompt 的模板，可使用 {history}、{sender}、{latest_message} 占位符",
+        description="静态人设 prompt，作为 system 消息置于请求最前，便于命中服务端 prompt 缓存",
     )
     simple_gpt_history_limit: int = Field(
         default=30,
@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import binascii
+import hashlib
 import io
 import mimetypes
+from collections import OrderedDict
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
 import httpx
@@ -21,6 +24,47 @@ except ImportError:
 
 IMAGE_FETCH_TIMEOUT = 15.0
 MAX_IMAGE_BYTES = 5 * 1024 * 1024
+IMAGE_READ_CHUNK_BYTES = 64 * 1024
+IMAGE_FETCH_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0
+)
+
+DATA_URL_CACHE_MAXSIZE = 128
+# 缓存中 data URL 的总长度上限；单张未压缩图片的 data URL 可达约 6.7 MB
+DATA_URL_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+_image_client: Optional[httpx.AsyncClient] = None
+# 已构造的 data URL，键为图片 URL 或原始内容摘要
+_data_url_cache: "OrderedDict[str, str]" = OrderedDict()
+# data URL -> 上面的缓存键，供调用方用短标识代替整段 data URL
+_data_url_keys: Dict[str, str] = {}
+_data_url_cache_bytes = 0
+
+
+def _get_image_client() -> httpx.AsyncClient:
+    """Get or create the shared httpx client used for image downloads."""
+
+    global _image_client
+
+    if _image_client is None or _image_client.is_closed:
+        _image_client = httpx.AsyncClient(
+            timeout=IMAGE_FETCH_TIMEOUT,
+            limits=IMAGE_FETCH_LIMITS,
+            follow_redirects=True,
+        )
+    return _image_client
+
+
+async def close_image_client() -> None:
+    """Release the shared image download client, if any."""
+
+    global _image_client
+
+    if _image_client is not None:
+        try:
+            await _image_client.aclose()
+        finally:
+            _image_client = None
 
 
 async def extract_image_data_urls(message: Message) -> List[str]:
@@ -30,13 +74,23 @@ async def extract_image_data_urls(message: Message) -> List[str]:
 
     plugin_config = get_plugin_config(Config)
 
+    # 多张图片并发处理，耗时取决于最慢的一张而非总和；gather 保持原有顺序
+    tasks = [
+        _segment_to_data_url(segment, plugin_config)
+        for segment in message
+        if segment.type == "image"
+    ]
+    if not tasks:
+        return []
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
     data_urls: List[str] = []
-    for segment in message:
-        if segment.type != "image":
+    for result in results:
+        if isinstance(result, BaseException):
+            logger.warning(f"simple-gpt: 处理图片片段时出错：{result}")
             continue
-        data_url = await _segment_to_data_url(segment, plugin_config)
-        if data_url:
-            data_urls.append(data_url)
+        if result:
+            data_urls.append(result)
     return data_urls
 
 
@@ -49,18 +103,26 @@ async def _segment_to_data_url(segment: MessageSegment, plugin_config) -> Option
     filename: Optional[str] = None
     if file_value:
         filename = file_value
+        # 按判断成本排序：字符串前缀检查在前，涉及文件系统的检查放在最后
         if file_value.startswith("base64://"):
             content = _decode_inline_base64(file_value)
-        elif _looks_like_url(file_value) and not url:
-            url = file_value
-        elif _is_local_path(file_value):
+        elif _looks_like_url(file_value):
+            if not url:
+                url = file_value
+        else:
             content = await _load_local_file(file_value)
 
     if content is None and path_value:
         filename = path_value
         content = await _load_local_file(path_value)
 
+    cache_key: Optional[str] = None
     if content is None and url:
+        # 图片 URL 视为不可变，命中缓存时跳过下载
+        cache_key = f"url:{url}"
+        cached = _get_cached_data_url(cache_key)
+        if cached is not None:
+            return cached
         content, _ = await _download_image(url)
 
     if content is None:
@@ -69,6 +131,12 @@ async def _segment_to_data_url(segment: MessageSegment, plugin_config) -> Option
         )
         return None
 
+    if cache_key is None:
+        cache_key = f"blake2b:{hashlib.blake2b(content, digest_size=16).hexdigest()}"
+        cached = _get_cached_data_url(cache_key)
+        if cached is not None:
+            return cached
+
     # 压缩图片
     if plugin_config.simple_gpt_image_compression_enabled:
         compressed_content = await compress_image(
@@ -84,9 +152,53 @@ async def _segment_to_data_url(segment: MessageSegment, plugin_config) -> Option
 
     content_type = _resolve_mime(content, content_type=None, filename=None)
     data_url = _build_data_url(content, content_type=content_type, filename=filename)
+    _store_cached_data_url(cache_key, data_url)
     return data_url
 
 
+def _get_cached_data_url(key: str) -> Optional[str]:
+    cached = _data_url_cache.get(key)
+    if cached is not None:
+        _data_url_cache.move_to_end(key)
+    return cached
+
+
+def _store_cached_data_url(key: str, data_url: str) -> None:
+    global _data_url_cache_bytes
+
+    size = len(data_url)
+    # 单条超过总上限的一半时不缓存，避免为它清空整个缓存
+    if size > DATA_URL_CACHE_MAX_BYTES // 2:
+        return
+    previous = _data_url_cache.pop(key, None)
+    if previous is not None:
+        _data_url_cache_bytes -= len(previous)
+        _data_url_keys.pop(previous, None)
+    _data_url_cache[key] = data_url
+    _data_url_keys[data_url] = key
+    _data_url_cache_bytes += size
+    while _data_url_cache and (
+        len(_data_url_cache) > DATA_URL_CACHE_MAXSIZE
+        or _data_url_cache_bytes > DATA_URL_CACHE_MAX_BYTES
+    ):
+        _, evicted = _data_url_cache.popitem(last=False)
+        _data_url_keys.pop(evicted, None)
+        _data_url_cache_bytes -= len(evicted)
+
+
+def data_url_digest(data_url: str) -> str:
+    """返回 data URL 的短标识。
+
+    由本模块生成的 data URL 直接复用其缓存键（字符串哈希值已缓存，查找近乎
+    O(1)）；其他来源的 data URL 才会对全文计算摘要。
+    """
+    key = _data_url_keys.get(data_url)
+    if key is not None:
+        return key
+    digest = hashlib.blake2b(data_url.encode("utf-8"), digest_size=16).hexdigest()
+    return f"blake2b:{digest}"
+
+
 def _decode_inline_base64(value: str) -> Optional[bytes]:
     payload = value.replace("base64://", "", 1)
     try:
@@ -96,16 +208,11 @@ def _decode_inline_base64(value: str) -> Optional[bytes]:
         return None
 
 
-def _looks_like_url(text: str) -> bool:
-    return text.startswith("http://") or text.startswith("https://")
+_URL_PREFIXES = ("http://", "https://")
 
 
-def _is_local_path(text: str) -> bool:
-    parsed = urlparse(text)
-    if parsed.scheme == "file":
-        return True
-    path = Path(text)
-    return path.exists()
+def _looks_like_url(text: str) -> bool:
+    return text.startswith(_URL_PREFIXES)
 
 
 async def _load_local_file(path_str: str) -> Optional[bytes]:
@@ -113,20 +220,35 @@ async def _load_local_file(path_str: str) -> Optional[bytes]:
     if path is None:
         return None
     try:
-        data = await asyncio.to_thread(path.read_bytes)
+        data = await asyncio.to_thread(_read_file_capped, path)
     except Exception as exc:  # noqa: BLE001
         logger.warning(f"simple-gpt: 读取本地图片失败：{exc}")
         return None
-    if len(data) > MAX_IMAGE_BYTES:
-        logger.warning(f"simple-gpt: 本地图片过大（{len(data)} bytes），已忽略")
+    if data is None:
+        logger.warning(
+            f"simple-gpt: 本地图片过大（超过 {MAX_IMAGE_BYTES} bytes），已忽略"
+        )
         return None
     return data
 
 
+def _read_file_capped(path: Path) -> Optional[bytes]:
+    """分块读取文件，超过大小上限时立即中止并返回 None（在线程中执行）。"""
+    buffer = bytearray()
+    with path.open("rb") as file:
+        while True:
+            chunk = file.read(IMAGE_READ_CHUNK_BYTES)
+            if not chunk:
+                break
+            buffer.extend(chunk)
+            if len(buffer) > MAX_IMAGE_BYTES:
+                return None
+    return bytes(buffer)
+
+
 def _resolve_path(path_str: str) -> Optional[Path]:
-    parsed = urlparse(path_str)
-    if parsed.scheme == "file":
-        return Path(parsed.path)
+    if path_str.startswith("file:"):
+        return Path(urlparse(path_str).path)
     path = Path(path_str)
     if path.exists():
         return path
@@ -134,29 +256,47 @@ def _resolve_path(path_str: str) -> Optional[Path]:
 
 
 async def _download_image(url: str) -> Tuple[Optional[bytes], Optional[str]]:
+    # 流式读取，超过大小上限时立即中止，避免把超大文件整个读入内存
     try:
-        async with httpx.AsyncClient(timeout=IMAGE_FETCH_TIMEOUT) as client:
-            response = await client.get(url)
+        async with _get_image_client().stream("GET", url) as response:
             response.raise_for_status()
+            content_length = response.headers.get("content-length")
+            if content_length and content_length.isdigit():
+                if int(content_length) > MAX_IMAGE_BYTES:
+                    logger.warning(
+                        f"simple-gpt: 图片过大（{content_length} bytes），已忽略"
+                    )
+                    return None, None
+
+            buffer = bytearray()
+            async for chunk in response.aiter_bytes(IMAGE_READ_CHUNK_BYTES):
+                buffer.extend(chunk)
+                if len(buffer) > MAX_IMAGE_BYTES:
+                    logger.warning(
+                        f"simple-gpt: 图片过大（超过 {MAX_IMAGE_BYTES} bytes），已忽略"
+                    )
+                    return None, None
+            content_type = response.headers.get("content-type")
     except Exception as exc:  # noqa: BLE001
         logger.warning(f"simple-gpt: 下载图片失败 {url}：{exc}")
         return None, None
 
-    data = response.content
-    if len(data) > MAX_IMAGE_BYTES:
-        logger.warning(f"simple-gpt: 图片过大（{len(data)} bytes），已忽略")
-        return None, None
-
-    content_type = response.headers.get("content-type")
-    return data, content_type
+    return bytes(buffer), content_type
 
 
 def _build_data_url(
     content: bytes, *, content_type: Optional[str], filename: Optional[str]
 ) -> str:
     mime = _resolve_mime(content, content_type=content_type, filename=filename)
-    encoded = base64.b64encode(content).decode("ascii")
-    return f"data:{mime};base64,{encoded}"
+    # b2a_base64 直接产出不带换行的编码结果，拼接后只解码一次。写成单个表达式，
+    # 让编码结果在拼接后即可释放，避免多持有一份完整大小的缓冲区。
+    # 编码期间不释放 GIL，放到线程中也无法避免阻塞事件循环，因此直接在此执行
+    return (
+        b"data:"
+        + mime.encode("ascii")
+        + b";base64,"
+        + binascii.b2a_base64(content, newline=False)
+    ).decode("ascii")
 
 
 def _resolve_mime(
@@ -177,10 +317,14 @@ def _resolve_mime(
 def detect_image_mime(content: bytes) -> Optional[str]:
     """Detect image MIME type without deprecated stdlib imghdr.
 
-    Python 3.13 removed imghdr. Pillow is already a runtime dependency of this
-    plugin, so prefer Pillow's format detection and keep a tiny signature
-    fallback for environments where Pillow is unavailable.
+    Python 3.13 removed imghdr. Common formats are recognised from their magic
+    bytes first, which is a handful of prefix compares; Pillow's format
+    detection is only consulted for anything the signature table misses.
     """
+    detected = _detect_image_mime_by_signature(content)
+    if detected:
+        return detected
+
     if PIL_AVAILABLE:
         try:
             with Image.open(io.BytesIO(content)) as image:
@@ -190,25 +334,27 @@ def detect_image_mime(content: bytes) -> Optional[str]:
                         return mime
                     return f"image/{image.format.lower()}"
         except Exception:  # noqa: BLE001
-            logger.debug("simple-gpt: Pillow 无法识别图片 MIME，尝试签名兜底")
+            logger.debug("simple-gpt: Pillow 无法识别图片 MIME")
+
+    return None
+
 
-    return _detect_image_mime_by_signature(content)
+_IMAGE_SIGNATURES: Tuple[Tuple[Tuple[bytes, ...], str], ...] = (
+    ((b"\xff\xd8\xff",), "image/jpeg"),
+    ((b"\x89PNG\r\n\x1a\n",), "image/png"),
+    ((b"GIF87a", b"GIF89a"), "image/gif"),
+    ((b"BM",), "image/bmp"),
+    ((b"II*\x00", b"MM\x00*"), "image/tiff"),
+)
 
 
 def _detect_image_mime_by_signature(content: bytes) -> Optional[str]:
-    """Small fallback for common image signatures."""
-    if content.startswith(b"\xff\xd8\xff"):
-        return "image/jpeg"
-    if content.startswith(b"\x89PNG\r\n\x1a\n"):
-        return "image/png"
-    if content.startswith((b"GIF87a", b"GIF89a")):
-        return "image/gif"
+    """Match common image signatures by magic bytes."""
+    for prefixes, mime in _IMAGE_SIGNATURES:
+        if content.startswith(prefixes):
+            return mime
     if content.startswith(b"RIFF") and content[8:12] == b"WEBP":
         return "image/webp"
-    if content.startswith(b"BM"):
-        return "image/bmp"
-    if content.startswith((b"II*\x00", b"MM\x00*")):
-        return "image/tiff"
     return None
 
 
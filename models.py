@@ -4,6 +4,10 @@ from dataclasses import dataclass, field
 from typing import List
 
 
+def append_image_hint(content: str, count: int) -> str:
+    return f"{content}\n（附带 {count} 张图片）"
+
+
 @dataclass
 class HistoryEntry:
     speaker: str
@@ -11,3 +15,12 @@ class HistoryEntry:
     is_bot: bool = False
     images: List[str] = field(default_factory=list)
     user_id: str = ""  # 平台用户 ID（如 QQ 号），bot 消息为空
+    # 拼接 prompt 时使用的单行文本，构造时计算一次
+    line: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        content = self.content
+        if self.images:
+            content = append_image_hint(content, len(self.images))
+        speaker = f"{self.speaker}({self.user_id})" if self.user_id else self.speaker
+        self.line = f"{speaker}：{content}"
@@ -16,6 +16,7 @@ class LLMRequestPayload:
     history: Sequence[HistoryEntry]
     sender: str
     latest_message: str
+    system_prompt: str = ""
     images: List[str] = field(default_factory=list)
     extra: Dict[str, Any] = field(default_factory=dict)
 
@@ -49,6 +50,9 @@ class SimpleGPTPlugin:
 class PluginManager:
     def __init__(self) -> None:
         self._plugins: List[Tuple[int, SimpleGPTPlugin]] = []
+        # 注册时预先展开，只保留真正覆写了对应钩子的插件
+        self._before_hooks: List[SimpleGPTPlugin] = []
+        self._after_hooks: List[SimpleGPTPlugin] = []
 
     def register(self, plugin: SimpleGPTPlugin, *, priority: int | None = None) -> None:
         plugin_priority = (
@@ -56,6 +60,12 @@ class PluginManager:
         )
         self._plugins.append((plugin_priority, plugin))
         self._plugins.sort(key=lambda item: item[0], reverse=True)
+        self._before_hooks = [
+            p for _, p in self._plugins if _overrides(p, "before_llm_request")
+        ]
+        self._after_hooks = [
+            p for _, p in self._plugins if _overrides(p, "after_llm_response")
+        ]
         self._log_plugin_order()
 
     def _log_plugin_order(self) -> None:
@@ -71,18 +81,27 @@ class PluginManager:
     async def run_before_llm_request(
         self, payload: LLMRequestPayload
     ) -> LLMRequestPayload:
-        for _, plugin in self._plugins:
+        if not self._before_hooks:
+            return payload
+        for plugin in self._before_hooks:
             payload = await plugin.before_llm_request(payload)
         return payload
 
     async def run_after_llm_response(
         self, payload: LLMResponsePayload
     ) -> LLMResponsePayload:
-        for _, plugin in self._plugins:
+        if not self._after_hooks:
+            return payload
+        for plugin in self._after_hooks:
             payload = await plugin.after_llm_response(payload)
         return payload
 
 
+def _overrides(plugin: SimpleGPTPlugin, hook: str) -> bool:
+    """判断插件是否覆写了基类中的空钩子。"""
+    return getattr(type(plugin), hook) is not getattr(SimpleGPTPlugin, hook)
+
+
 plugin_manager = PluginManager()
 
 
@@ -105,8 +105,8 @@ class DateTimeWeatherPlugin(SimpleGPTPlugin):
         if weather_str:
             payload.extra["weather"] = weather_str
 
-        # 将上下文信息添加到 prompt 的开头
-        payload.prompt = f"{context_info}\n\n{payload.prompt}"
+        # 将上下文信息添加到 prompt 的末尾
+        payload.prompt = f"{payload.prompt}\n\n{context_info}"
 
         logger.debug(f"simple-gpt: 已添加时间天气信息 - {context_info}")
 
@@ -237,7 +237,8 @@ class HindsightMemoryPlugin(SimpleGPTPlugin):
         self, payload: LLMRequestPayload
     ) -> LLMRequestPayload:
         self._ensure_config_loaded()
-        if not self._enabled:
+        # 语义缓存已给出回复时不会再调用模型，无需检索记忆
+        if not self._enabled or payload.extra.get("cached_reply"):
             return payload
         try:
             res = self._resolve(payload.extra)
@@ -18,7 +18,9 @@ class RemoveThinkTagPlugin(SimpleGPTPlugin):
     async def after_llm_response(
         self, payload: LLMResponsePayload
     ) -> LLMResponsePayload:
-        payload.content = "<think>232323232323</think>\n" + payload.content
+        # 绝大多数回复不含 think 标签，直接跳过正则替换
+        if "<think>" not in payload.content.lower():
+            return payload
         cleaned = self._pattern.sub("", payload.content).strip()
         payload.content = cleaned or payload.content
         return payload
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import math
+import operator
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Tuple
+
+from nonebot import get_driver
+from nonebot.log import logger
+from openai import APITimeoutError, AsyncOpenAI
+
+from ..plugin_config_inject import register_plugin_config_field
+from ..plugin_system import (
+    LLMRequestPayload,
+    LLMResponsePayload,
+    SimpleGPTPlugin,
+    register_simple_gpt_plugin,
+)
+
+# ---------- 注册配置字段 ----------
+
+register_plugin_config_field(
+    "simple_gpt_semantic_cache_threshold",
+    float,
+    default=0.0,
+    description="语义缓存命中所需的余弦相似度（0 表示禁用语义缓存）",
+    ge=0.0,
+    le=1.0,
+)
+register_plugin_config_field(
+    "simple_gpt_semantic_cache_max_entries",
+    int,
+    default=64,
+    description="每个会话中每位提问者保留的语义缓存条目上限",
+    ge=1,
+    le=128,
+)
+register_plugin_config_field(
+    "simple_gpt_semantic_cache_ttl",
+    int,
+    default=300,
+    description="语义缓存条目的有效期（秒），0 表示不过期",
+    ge=0,
+)
+register_plugin_config_field(
+    "simple_gpt_semantic_cache_embedding_api_key",
+    str,
+    default="",
+    description="语义缓存 Embedding API Key（留空则使用主 API Key）",
+)
+register_plugin_config_field(
+    "simple_gpt_semantic_cache_embedding_api_base",
+    str,
+    default="",
+    description="语义缓存 Embedding API Base URL（留空则使用主 API Base URL）",
+)
+register_plugin_config_field(
+    "simple_gpt_semantic_cache_embedding_model",
+    str,
+    default="text-embedding-3-small",
+    description="语义缓存使用的 Embedding 模型",
+)
+register_plugin_config_field(
+    "simple_gpt_semantic_cache_embedding_dimensions",
+    int,
+    default=256,
+    description="语义缓存 Embedding 维度（<=0 时使用模型默认维度，相似度计算会明显变慢）",
+    ge=0,
+    le=4096,
+)
+
+if TYPE_CHECKING:
+    from .. import Config
+
+
+EMBEDDING_MAX_RETRIES = 1
+
+# (归一化向量, 回复, 写入时间)
+_CacheEntry = Tuple[List[float], str, float]
+# (会话 ID, 提问者 QQ)：回复通常会点名提问者，不能复用给其他人
+_CacheScope = Tuple[str, str]
+
+
+def _get_plugin_config() -> "Config":
+    from .. import plugin_config
+    return plugin_config
+
+
+def _normalize(vector: List[float]) -> Optional[List[float]]:
+    norm = math.sqrt(sum(value * value for value in vector))
+    if norm == 0:
+        return None
+    return [value / norm for value in vector]
+
+
+class SemanticCachePlugin(SimpleGPTPlugin):
+    """语义缓存插件：@ 消息与同一提问者的近期问题足够相似时直接复用之前的回复。"""
+
+    priority = 280  # 在 proactive_filter 之后、记忆与搜索等增强插件之前
+
+    def __init__(self) -> None:
+        self._config_loaded = False
+        self._threshold = 0.0
+        self._max_entries = 64
+        self._ttl = 0
+        self._api_key = ""
+        self._api_base = ""
+        self._model = ""
+        self._dimensions = 0
+        self._timeout = 0.0
+        self._client: Optional[AsyncOpenAI] = None
+        # 每个会话中每位提问者的缓存条目，按最近使用排序
+        self._store: Dict[_CacheScope, Deque[_CacheEntry]] = {}
+        # 未命中请求的向量，等拿到回复后写入缓存。不放进 payload.extra，
+        # 因为其他插件会把 extra 拼进给模型的上下文
+        self._pending: Dict[Tuple[str, str, str], List[float]] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def _ensure_config_loaded(self) -> None:
+        if self._config_loaded:
+            return
+        config = _get_plugin_config()
+        # Prompt 调试模式下返回的是 prompt 本身，不能缓存
+        self._threshold = (
+            0.0
+            if config.simple_gpt_prompt_debug
+            else config.simple_gpt_semantic_cache_threshold
+        )
+        self._max_entries = config.simple_gpt_semantic_cache_max_entries
+        self._ttl = config.simple_gpt_semantic_cache_ttl
+        self._api_key = (
+            config.simple_gpt_semantic_cache_embedding_api_key
+            or config.simple_gpt_api_key
+        )
+        self._api_base = (
+            config.simple_gpt_semantic_cache_embedding_api_base
+            or config.simple_gpt_api_base
+        )
+        self._model = config.simple_gpt_semantic_cache_embedding_model
+        self._dimensions = config.simple_gpt_semantic_cache_embedding_dimensions
+        self._timeout = config.simple_gpt_timeout
+        self._config_loaded = True
+        logger.info(
+            f"simple-gpt: semantic_cache 插件已加载 "
+            f"(状态: {'已启用' if self._enabled else '未启用'}, "
+            f"threshold={self._threshold}, model={self._model})"
+        )
+
+    @property
+    def _enabled(self) -> bool:
+        return self._threshold > 0 and bool(self._api_key)
+
+    async def before_llm_request(
+        self, payload: LLMRequestPayload
+    ) -> LLMRequestPayload:
+        self._ensure_config_loaded()
+
+        # 主动发言与带图消息不适合按文字相似度复用；payload.images 还包含
+        # 历史消息中的图片，这里只看最新一条消息自身是否带图
+        if (
+            not self._enabled
+            or payload.extra.get("is_proactive")
+            or payload.extra.get("skip_llm")
+            or payload.extra.get("latest_image_count")
+        ):
+            return payload
+
+        session_id = payload.extra.get("session_id")
+        sender_user_id = payload.extra.get("sender_user_id")
+        if not session_id or not sender_user_id:
+            return payload
+        scope = (session_id, sender_user_id)
+
+        try:
+            vector = await self._embed(payload.latest_message)
+        except APITimeoutError:
+            logger.warning(
+                f"simple-gpt: semantic_cache 生成 embedding 超时（{self._timeout}s），"
+                "本次跳过语义缓存"
+            )
+            return payload
+        except Exception as exc:
+            logger.warning(f"simple-gpt: semantic_cache 生成 embedding 失败 - {exc}")
+            return payload
+        if vector is None:
+            return payload
+
+        entries = self._store.get(scope)
+        if entries and self._ttl > 0:
+            # 回复可能包含时间、天气等时效信息，过期条目直接丢弃
+            now = time.monotonic()
+            fresh = [entry for entry in entries if now - entry[2] < self._ttl]
+            if not fresh:
+                del self._store[scope]
+                entries = None
+            elif len(fresh) != len(entries):
+                entries.clear()
+                entries.extend(fresh)
+
+        # 在事件循环上计算：默认 256 维 × 最多 128 条，单次查找约 1ms
+        best: Optional[_CacheEntry] = None
+        best_score = -1.0
+        for entry in entries or ():
+            score = sum(map(operator.mul, entry[0], vector))
+            if score > best_score:
+                best, best_score = entry, score
+
+        if entries is not None and best is not None and best_score >= self._threshold:
+            # 命中后移到队尾，淘汰时优先丢弃最久未使用的条目
+            entries.remove(best)
+            entries.append(best)
+            self._hits += 1
+            logger.info(
+                f"simple-gpt: semantic_cache 命中 (score={best_score:.3f}, "
+                f"hits={self._hits}, misses={self._misses})"
+            )
+            payload.extra["cached_reply"] = best[1]
+            return payload
+
+        self._misses += 1
+        self._pending[(*scope, payload.latest_message)] = vector
+        return payload
+
+    async def after_llm_response(
+        self, payload: LLMResponsePayload
+    ) -> LLMResponsePayload:
+        request = payload.request
+        scope = (request.extra.get("session_id"), request.extra.get("sender_user_id"))
+        vector = self._pending.pop((*scope, request.latest_message), None)
+        if vector is None or payload.extra.get("is_fallback_reply"):
+            return payload
+
+        entries = self._store.get(scope)
+        if entries is None:
+            entries = deque(maxlen=self._max_entries)
+            self._store[scope] = entries
+        entries.append((vector, payload.content, time.monotonic()))
+        return payload
+
+    async def _embed(self, text: str) -> Optional[List[float]]:
+        if self._client is None:
+            # 每次 @ 回复都要先等待 embedding：沿用主超时配置，且只重试一次
+            self._client = AsyncOpenAI(
+                api_key=self._api_key,
+                base_url=self._api_base,
+                timeout=self._timeout,
+                max_retries=EMBEDDING_MAX_RETRIES,
+            )
+        if self._dimensions > 0:
+            response = await self._client.embeddings.create(
+                model=self._model, input=text, dimensions=self._dimensions
+            )
+        else:
+            response = await self._client.embeddings.create(model=self._model, input=text)
+        return _normalize(response.data[0].embedding)
+
+    async def close(self) -> None:
+        if self._client is not None:
+            try:
+                await self._client.close()
+            finally:
+                self._client = None
+
+
+_plugin_instance = SemanticCachePlugin()
+register_simple_gpt_plugin(_plugin_instance)
+
+driver = get_driver()
+
+
+@driver.on_shutdown
+async def _close_semantic_cache() -> None:
+    await _plugin_instance.close()
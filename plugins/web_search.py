@@ -144,6 +144,10 @@ class WebSearchPlugin(SimpleGPTPlugin):
             logger.debug("simple-gpt: 网络搜索功能未启用，跳过")
             return payload
 
+        # 语义缓存已给出回复时不会再调用模型，无需搜索
+        if payload.extra.get("cached_reply"):
+            return payload
+
         if not self.check_api_key or not self.search_api_key:
             logger.warning(
                 "simple-gpt: 网络搜索功能已启用，但 API Key 未配置，跳过"